@@ -11,17 +11,29 @@ import argparse
 import base64
 import hashlib
 import socket
+import selectors
 import struct
 import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import json
 import requests
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlencode
 import uuid
 import logging
 import sys
 from pathlib import Path
 
+try:
+    import orjson  # Optional: much faster JSON encoding/decoding
+except ImportError:
+    orjson = None
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -30,6 +42,43 @@ BRIDGE_ID = "001788FFFE" + uuid.getnode().to_bytes(6, 'big')[-3:].hex().upper()
 BRIDGE_UUID = f"2f402f80-da50-11e1-9b23-{uuid.getnode():012x}"
 
 
+def json_dumps(data):
+    """Serialize data to JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode()
+
+
+def json_loads(data):
+    """Parse JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Hue color temperature range in mireds
+MIRED_MIN, MIRED_MAX = 153, 500
+
+
+def _white_color(mired):
+    """Return (cw, ww, color JSON) for a color temperature in mireds."""
+    # Mireds 153 = 6500K (cool white) -> cw=255, ww=0
+    # Mireds 500 = 2000K (warm white) -> cw=0, ww=255
+    normalized = (mired - MIRED_MIN) / (MIRED_MAX - MIRED_MIN)
+
+    # Interpolate between cold and warm white
+    cw = int(255 * (1 - normalized))  # 255 -> 0
+    ww = int(255 * normalized)         # 0 -> 255
+
+    # Build color JSON for Domoticz (m=2 = White mode for RGBWW)
+    color_json = json_dumps({"m": 2, "t": 0, "r": 0, "g": 0, "b": 0, "cw": cw, "ww": ww}).decode()
+    return cw, ww, color_json
+
+
+# Precomputed white mix for every mired value Hue can send
+_CT_TABLE = {mired: _white_color(mired) for mired in range(MIRED_MIN, MIRED_MAX + 1)}
+
+
 def load_config(config_path):
     """Load configuration from YAML or JSON file."""
     path = Path(config_path)
@@ -54,6 +103,53 @@ def load_config(config_path):
     return config
 
 
+# Hue type, model id, product name and color mode reported per device type
+HUE_MODELS = {
+    "rgb": ("Extended color light", "LCT015", "Hue color lamp", "hs"),
+    "dimmer": ("Dimmable light", "LWB010", "Hue white lamp", "ct"),
+    "scene": ("On/Off plug-in unit", "LOM001", "Hue smart plug", "ct"),
+    "switch": ("On/Off plug-in unit", "LOM001", "Hue smart plug", "ct"),
+}
+
+
+class Device:
+    """A Domoticz device or scene exposed to Alexa as a Hue light."""
+
+    __slots__ = ("name", "idx", "type", "is_scene", "description",
+                 "status_key", "state_path", "uniqueid", "hue_meta", "static_state")
+
+    def __init__(self, light_id, name, idx, type="switch", is_scene=False, description=""):
+        self.name = name
+        self.idx = idx
+        self.type = type
+        self.is_scene = is_scene
+        self.description = description
+        # Key used by DomoticzController's status lookups and cache
+        self.status_key = (str(idx), is_scene)
+
+        # Everything in the Hue JSON except on/bri/hue/sat is fixed per light
+        hue_type, model_id, product_name, color_mode = HUE_MODELS.get(type, HUE_MODELS["switch"])
+        self.uniqueid = f"00:17:88:01:00:{light_id.zfill(2)}:00:00-0b"
+        self.state_path = f"/lights/{light_id}/state/"  # prefix for PUT acks
+        self.hue_meta = {
+            "type": hue_type,
+            "name": name,
+            "modelid": model_id,
+            "manufacturername": "Philips",
+            "productname": product_name,
+            "uniqueid": self.uniqueid,
+            "swversion": "1.0"
+        }
+        self.static_state = {
+            "effect": "none",
+            "xy": [0.0, 0.0],
+            "ct": 500,
+            "alert": "none",
+            "colormode": color_mode,
+            "reachable": True
+        }
+
+
 def build_devices_dict(config):
     """Build the DEVICES dictionary from config file."""
     devices = {}
@@ -61,28 +157,51 @@ def build_devices_dict(config):
 
     # Add regular devices (handle None case)
     for device in config.get('devices') or []:
-        devices[str(light_id)] = {
-            "name": device['name'],
-            "idx": device['idx'],
-            "type": device.get('type', 'switch'),
-            "is_scene": False
-        }
+        devices[str(light_id)] = Device(
+            str(light_id),
+            name=device['name'],
+            idx=device['idx'],
+            type=device.get('type', 'switch')
+        )
         light_id += 1
 
     # Add scenes as virtual switches (handle None case)
     for scene in config.get('scenes') or []:
-        devices[str(light_id)] = {
-            "name": scene['name'],
-            "idx": scene['idx'],
-            "type": "scene",
-            "is_scene": True,
-            "description": scene.get('description', '')
-        }
+        devices[str(light_id)] = Device(
+            str(light_id),
+            name=scene['name'],
+            idx=scene['idx'],
+            type="scene",
+            is_scene=True,
+            description=scene.get('description', '')
+        )
         light_id += 1
 
     return devices
 
 
+def build_description_xml(bridge_ip, http_port):
+    """Build the UPnP device description served at /description.xml."""
+    xml = f"""<?xml version="1.0" encoding="UTF-8" ?>
+<root xmlns="urn:schemas-upnp-org:device-1-0">
+    <specVersion><major>1</major><minor>0</minor></specVersion>
+    <URLBase>http://{bridge_ip}:{http_port}/</URLBase>
+    <device>
+        <deviceType>urn:schemas-upnp-org:device:Basic:1</deviceType>
+        <friendlyName>Philips Hue ({bridge_ip})</friendlyName>
+        <manufacturer>Royal Philips Electronics</manufacturer>
+        <manufacturerURL>http://www.philips.com</manufacturerURL>
+        <modelDescription>Philips hue Personal Wireless Lighting</modelDescription>
+        <modelName>Philips hue bridge 2015</modelName>
+        <modelNumber>BSB002</modelNumber>
+        <modelURL>http://www.meethue.com</modelURL>
+        <serialNumber>{BRIDGE_ID}</serialNumber>
+        <UDN>uuid:{BRIDGE_UUID}</UDN>
+    </device>
+</root>"""
+    return xml.encode()
+
+
 def get_local_ip():
     """Get the local IP address of this machine."""
     s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -97,97 +216,221 @@ def get_local_ip():
 class DomoticzController:
     """Interface to Domoticz API."""
 
+    # Reported when Domoticz does not return a status for a device
+    OFF_STATUS = {"on": False, "bri": 0, "hue": 0, "sat": 0}
+
     def __init__(self, base_url, username="", password=""):
         self.base_url = base_url.rstrip('/')
         self.username = username
         self.password = password
+        # Credentials never change, so encode them once for every (re)login
+        self._login_params = {
+            "type": "command",
+            "param": "logincheck",
+            "username": base64.b64encode(username.encode()).decode(),
+            "password": hashlib.md5(password.encode()).hexdigest()
+        } if username else None
         self.session = requests.Session()
-        self._logged_in = False
+        # Keep warm connections to Domoticz and retry transient gateway errors.
+        # Connection failures and timeouts are not retried: with timeout=5 each
+        # retry would add 5 s, and Alexa gives up long before that.
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=32,
+            max_retries=Retry(total=2, connect=0, read=0, other=0, backoff_factor=0.1,
+                              status_forcelist=[502, 503, 504])
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Connection"] = "keep-alive"
+        # HTTP requests are served on multiple threads; only one may log in
+        self._login_lock = threading.Lock()
+        # Called before every Domoticz request; see _set_logged_in()
+        self._set_logged_in(not username)
+        # Short-lived status cache: Alexa polls the same lights repeatedly
+        self._cache_ttl = 1.5
+        self._status_cache = {}  # (idx, is_scene) -> (timestamp, status)
+        self._all_status_cache = None  # (timestamp, wanted, statuses)
+        # Writes bump a counter so reads that overlapped a write are not cached
+        self._cache_lock = threading.Lock()
+        self._write_count = 0
+        self._write_gen = {}  # (idx, is_scene) -> write count at last write
+        # On/off URLs per (param, idx, command); each light only has two
+        self._switch_url_cache = {}
+        # Worker pool for control commands sent without waiting on Domoticz;
+        # commands waiting per light, keyed like the status cache
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="domoticz")
+        self._pending = {}  # (idx, is_scene) -> deque of command batches
+        self._acked = {}  # (idx, is_scene) -> acked Hue state while pending
+        self._pending_lock = threading.Lock()
 
     def _login(self):
         """Login to Domoticz."""
         if not self.username:
+            self._set_logged_in(True)
             return True
 
         url = f"{self.base_url}/json.htm"
-        params = {
-            "type": "command",
-            "param": "logincheck",
-            "username": base64.b64encode(self.username.encode()).decode(),
-            "password": hashlib.md5(self.password.encode()).hexdigest()
-        }
         try:
-            response = self.session.get(url, params=params, timeout=5)
-            data = response.json()
+            response = self.session.get(url, params=self._login_params, timeout=5)
+            data = json_loads(response.content)
             if data.get("status") == "OK":
-                logger.info(f"Logged in to Domoticz as {self.username}")
-                self._logged_in = True
+                logger.info("Logged in to Domoticz as %s", self.username)
+                self._set_logged_in(True)
                 return True
             else:
-                logger.error(f"Domoticz login failed: {data}")
-                self._logged_in = False
+                logger.error("Domoticz login failed: %s", data)
+                self._set_logged_in(False)
                 return False
         except Exception as e:
-            logger.error(f"Domoticz login error: {e}")
-            self._logged_in = False
+            logger.error("Domoticz login error: %s", e)
+            self._set_logged_in(False)
             return False
 
-    def _ensure_login(self):
+    def _set_logged_in(self, logged_in):
+        """Record login state; while logged in, _ensure_login is a no-op."""
+        self._logged_in = logged_in
+        self._ensure_login = self._logged_in_noop if logged_in else self._login_if_needed
+
+    @staticmethod
+    def _logged_in_noop():
+        return True
+
+    def _login_if_needed(self):
         """Login to Domoticz if not already logged in."""
-        if self._logged_in:
-            return True
-        return self._login()
+        with self._login_lock:
+            # Another thread may have logged in while we waited for the lock
+            if self._logged_in:
+                return True
+            return self._login()
 
     def _handle_401_and_retry(self, request_func):
         """Execute request, re-authenticate on 401, and retry once."""
         response = request_func()
         if response is not None and response.status_code == 401:
             logger.info("Session expired (401), re-authenticating...")
-            self._logged_in = False
-            if self._login():
+            with self._login_lock:
+                self._set_logged_in(False)
+                logged_in = self._login()
+            if logged_in:
                 response = request_func()
         return response
 
+    def submit(self, key, acked, *commands):
+        """
+        Queue commands for one light and return without waiting for them.
+
+        Commands for the same key run one after another in the order they
+        were submitted, so the last PUT for a light always wins; different
+        lights are handled in parallel by the worker pool. acked holds the
+        Hue state values already acknowledged to Alexa; status reads report
+        them for this light until its queue has drained.
+        """
+        with self._pending_lock:
+            queue = self._pending.get(key)
+            if queue is None:
+                queue = self._pending[key] = deque()
+                start_worker = True
+            else:
+                # A worker is already draining this light's queue
+                start_worker = False
+            queue.append(commands)
+            # Replace rather than update, so readers never see a partial merge
+            self._acked[key] = {**self._acked.get(key, {}), **acked}
+        # Domoticz has not seen the command yet; force the next read to
+        # fetch, with the acked values laid on top of whatever it returns
+        self._invalidate_status(*key)
+        if start_worker:
+            self._executor.submit(self._drain_commands, key)
+
+    def _drain_commands(self, key):
+        """Run queued command batches for one light until its queue is empty."""
+        while True:
+            with self._pending_lock:
+                queue = self._pending[key]
+                if not queue:
+                    del self._pending[key]
+                    del self._acked[key]
+                    return
+                commands = queue.popleft()
+            for command in commands:
+                try:
+                    command()
+                except Exception as e:
+                    logger.error("Domoticz command error: %s", e)
+
+    def _get_cached_status(self, key):
+        """Return a cached status if it is still fresh, else None."""
+        cached = self._status_cache.get(key)
+        if cached and time.monotonic() - cached[0] < self._cache_ttl:
+            return cached[1]
+        return None
+
+    def _invalidate_status(self, idx, is_scene=False):
+        """Drop cached status after a write so the new state is read back."""
+        key = (str(idx), is_scene)
+        with self._cache_lock:
+            self._write_count += 1
+            self._write_gen[key] = self._write_count
+            self._status_cache.pop(key, None)
+            self._all_status_cache = None
+
+    def _store_status(self, key, status, started, now):
+        """
+        Cache a status read unless the light was written to since the read
+        began (started is the write count at that time) or still has queued
+        commands; otherwise the pre-write state would be served for the TTL.
+        Caller holds _cache_lock.
+        """
+        if self._write_gen.get(key, 0) > started or key in self._pending:
+            return False
+        self._status_cache[key] = (now, status)
+        return True
+
+    def _switch_url(self, param, idx, command):
+        """Return the full URL for an on/off command, building it only once."""
+        key = (param, idx, bool(command))
+        url = self._switch_url_cache.get(key)
+        if url is None:
+            query = urlencode({
+                "type": "command",
+                "param": param,
+                "idx": idx,
+                "switchcmd": "On" if command else "Off"
+            })
+            url = self._switch_url_cache[key] = f"{self.base_url}/json.htm?{query}"
+        return url
+
     def switch_light(self, idx, command):
         """Turn a switch on or off."""
         self._ensure_login()
-        url = f"{self.base_url}/json.htm"
-        params = {
-            "type": "command",
-            "param": "switchlight",
-            "idx": idx,
-            "switchcmd": "On" if command else "Off"
-        }
+        url = self._switch_url("switchlight", idx, command)
         try:
             def make_request():
-                return self.session.get(url, params=params, timeout=5)
+                return self.session.get(url, timeout=5)
 
             response = self._handle_401_and_retry(make_request)
-            logger.info(f"Domoticz switch {idx} -> {'On' if command else 'Off'}: {response.status_code}")
+            self._invalidate_status(idx)
+            logger.info("Domoticz switch %s -> %s: %s", idx, "On" if command else "Off", response.status_code)
             return response.status_code == 200
         except Exception as e:
-            logger.error(f"Domoticz error: {e}")
+            logger.error("Domoticz error: %s", e)
             return False
 
     def switch_scene(self, idx, command):
         """Activate or deactivate a scene."""
         self._ensure_login()
-        url = f"{self.base_url}/json.htm"
-        params = {
-            "type": "command",
-            "param": "switchscene",
-            "idx": idx,
-            "switchcmd": "On" if command else "Off"
-        }
+        url = self._switch_url("switchscene", idx, command)
         try:
             def make_request():
-                return self.session.get(url, params=params, timeout=5)
+                return self.session.get(url, timeout=5)
 
             response = self._handle_401_and_retry(make_request)
-            logger.info(f"Domoticz scene {idx} -> {'On' if command else 'Off'}: {response.status_code}")
+            self._invalidate_status(idx, is_scene=True)
+            logger.info("Domoticz scene %s -> %s: %s", idx, "On" if command else "Off", response.status_code)
             return response.status_code == 200
         except Exception as e:
-            logger.error(f"Domoticz scene error: {e}")
+            logger.error("Domoticz scene error: %s", e)
             return False
 
     def set_dimmer(self, idx, level):
@@ -206,10 +449,11 @@ class DomoticzController:
                 return self.session.get(url, params=params, timeout=5)
 
             response = self._handle_401_and_retry(make_request)
-            logger.info(f"Domoticz dimmer {idx} -> {level}%: {response.status_code}")
+            self._invalidate_status(idx)
+            logger.info("Domoticz dimmer %s -> %s%%: %s", idx, level, response.status_code)
             return response.status_code == 200
         except Exception as e:
-            logger.error(f"Domoticz error: {e}")
+            logger.error("Domoticz error: %s", e)
             return False
 
     def set_rgb_color(self, idx, hue=None, saturation=None, brightness=None):
@@ -237,10 +481,12 @@ class DomoticzController:
                 return self.session.get(url, params=params, timeout=5)
 
             response = self._handle_401_and_retry(make_request)
-            logger.info(f"Domoticz RGB {idx} -> hue={params.get('hue')}, sat={params.get('saturation')}, bri={params.get('brightness')}: {response.status_code}")
+            self._invalidate_status(idx)
+            logger.info("Domoticz RGB %s -> hue=%s, sat=%s, bri=%s: %s", idx, params.get("hue"),
+                        params.get("saturation"), params.get("brightness"), response.status_code)
             return response.status_code == 200
         except Exception as e:
-            logger.error(f"Domoticz RGB error: {e}")
+            logger.error("Domoticz RGB error: %s", e)
             return False
 
     def set_white_color(self, idx, color_temp, brightness=None):
@@ -253,19 +499,9 @@ class DomoticzController:
         self._ensure_login()
         url = f"{self.base_url}/json.htm"
 
-        # Convert mireds to cw/ww mix
-        # Mireds 153 = 6500K (cool white) -> cw=255, ww=0
-        # Mireds 500 = 2000K (warm white) -> cw=0, ww=255
-        mired_min, mired_max = 153, 500
-        normalized = (color_temp - mired_min) / (mired_max - mired_min)
-        normalized = max(0, min(1, normalized))  # Clamp to 0-1
-
-        # Interpolate between cold and warm white
-        cw = int(255 * (1 - normalized))  # 255 -> 0
-        ww = int(255 * normalized)         # 0 -> 255
-
-        # Build color JSON for Domoticz (m=2 = White mode for RGBWW)
-        color_json = json.dumps({"m": 2, "t": 0, "r": 0, "g": 0, "b": 0, "cw": cw, "ww": ww})
+        # Hue sends whole mireds, so the cw/ww mix comes from a lookup table
+        mired = max(MIRED_MIN, min(MIRED_MAX, int(color_temp)))
+        cw, ww, color_json = _CT_TABLE[mired]
 
         bri_level = int(brightness * 100 / 254) if brightness else 100
 
@@ -282,10 +518,11 @@ class DomoticzController:
                 return self.session.get(url, params=params, timeout=5)
 
             response = self._handle_401_and_retry(make_request)
-            logger.info(f"Domoticz White {idx} -> cw={cw}, ww={ww}, bri={bri_level}%: {response.status_code}")
+            self._invalidate_status(idx)
+            logger.info("Domoticz White %s -> cw=%s, ww=%s, bri=%s%%: %s", idx, cw, ww, bri_level, response.status_code)
             return response.status_code == 200
         except Exception as e:
-            logger.error(f"Domoticz white error: {e}")
+            logger.error("Domoticz white error: %s", e)
             return False
 
     def set_brightness(self, idx, brightness):
@@ -305,14 +542,27 @@ class DomoticzController:
                 return self.session.get(url, params=params, timeout=5)
 
             response = self._handle_401_and_retry(make_request)
-            logger.info(f"Domoticz brightness {idx} -> {level}%: {response.status_code}")
+            self._invalidate_status(idx)
+            logger.info("Domoticz brightness %s -> %s%%: %s", idx, level, response.status_code)
             return response.status_code == 200
         except Exception as e:
-            logger.error(f"Domoticz brightness error: {e}")
+            logger.error("Domoticz brightness error: %s", e)
             return False
 
     def get_device_status(self, idx, is_scene=False):
         """Get current device or scene status from Domoticz."""
+        key = (str(idx), is_scene)
+        # Taken before the read, so a command finishing meanwhile still shows
+        acked = self._acked.get(key)
+        status = self._read_device_status(key, idx, is_scene)
+        return {**status, **acked} if acked else status
+
+    def _read_device_status(self, key, idx, is_scene):
+        """Get a status from the cache or Domoticz, ignoring queued commands."""
+        cached = self._get_cached_status(key)
+        if cached is not None:
+            return cached
+
         self._ensure_login()
         url = f"{self.base_url}/json.htm"
 
@@ -321,73 +571,144 @@ class DomoticzController:
         else:
             params = {"type": "command", "param": "getdevices", "rid": idx}
 
+        started = self._write_count
+        status = None
         try:
             def make_request():
                 return self.session.get(url, params=params, timeout=5)
 
             response = self._handle_401_and_retry(make_request)
-            data = response.json()
+            data = json_loads(response.content)
 
             if is_scene:
                 # Find the specific scene
                 for scene in data.get("result", []):
                     if str(scene.get("idx")) == str(idx):
-                        return {
-                            "on": scene.get("Status") == "On",
-                            "bri": 254,
-                            "hue": 0,
-                            "sat": 0
-                        }
+                        status = self._scene_status(scene)
+                        break
             else:
                 if data.get("result"):
-                    device = data["result"][0]
-                    is_on = device.get("Status", "Off") != "Off"
-                    # For dimmer/RGB, use Level; for simple switches, use 254 when on
-                    level = device.get("Level", 0)
-                    if level == 0 and is_on:
-                        level = 100  # Treat on switches as 100%
-                    status = {
-                        "on": is_on,
-                        "bri": int(level * 2.54),
-                        "hue": 0,
-                        "sat": 0
-                    }
-                    if "Color" in device:
-                        try:
-                            color = json.loads(device["Color"]) if isinstance(device["Color"], str) else device["Color"]
-                            r, g, b = color.get("r", 0), color.get("g", 0), color.get("b", 0)
-                            h, s, v = self._rgb_to_hsv(r, g, b)
-                            status["hue"] = int(h * 65535)
-                            status["sat"] = int(s * 254)
-                        except (json.JSONDecodeError, TypeError):
-                            pass
-                    return status
+                    status = self._device_status(data["result"][0])
         except Exception as e:
-            logger.error(f"Domoticz status error: {e}")
+            logger.error("Domoticz status error: %s", e)
+
+        if status is None:
+            return dict(self.OFF_STATUS)
 
-        return {"on": False, "bri": 0, "hue": 0, "sat": 0}
+        with self._cache_lock:
+            self._store_status(key, status, started, time.monotonic())
+        return status
+
+    def get_all_device_status(self, wanted=None):
+        """
+        Get the status of every device and scene with one request each.
+
+        Returns a dict keyed by (idx, is_scene), with idx as a string, since
+        devices and scenes have separate idx ranges in Domoticz. If wanted is
+        a set of such keys, all other entries in the Domoticz response are
+        skipped, and scenes are only fetched if any are wanted.
+        """
+        acked = dict(self._acked)
+        statuses = self._read_all_device_status(wanted)
+        if acked:
+            statuses = dict(statuses)
+            for key, values in acked.items():
+                if wanted is None or key in wanted:
+                    statuses[key] = {**statuses.get(key, self.OFF_STATUS), **values}
+        return statuses
+
+    def _read_all_device_status(self, wanted):
+        """Get all statuses from the cache or Domoticz, ignoring queued commands."""
+        cached = self._all_status_cache
+        if cached and cached[1] == wanted and time.monotonic() - cached[0] < self._cache_ttl:
+            return cached[2]
+
+        include_scenes = wanted is None or any(is_scene for _, is_scene in wanted)
+
+        self._ensure_login()
+        url = f"{self.base_url}/json.htm"
+        statuses = {}
+
+        requests_to_make = [(False, {"type": "command", "param": "getdevices", "filter": "all"})]
+        if include_scenes:
+            requests_to_make.append((True, {"type": "command", "param": "getscenes"}))
+
+        started = self._write_count
+        complete = True
+        for is_scene, params in requests_to_make:
+            try:
+                def make_request():
+                    return self.session.get(url, params=params, timeout=5)
+
+                response = self._handle_401_and_retry(make_request)
+                data = json_loads(response.content)
+                parse = self._scene_status if is_scene else self._device_status
+                for entry in data.get("result", []):
+                    key = (str(entry.get("idx")), is_scene)
+                    # Large installs return far more devices than Alexa uses
+                    if wanted is None or key in wanted:
+                        statuses[key] = parse(entry)
+            except Exception as e:
+                logger.error("Domoticz status error: %s", e)
+                complete = False
+
+        now = time.monotonic()
+        with self._cache_lock:
+            for key, status in statuses.items():
+                complete &= self._store_status(key, status, started, now)
+            if complete and self._write_count == started:
+                self._all_status_cache = (now, wanted, statuses)
+        return statuses
+
+    def _device_status(self, device):
+        """Convert a Domoticz device entry to Hue-style state values."""
+        is_on = device.get("Status", "Off") != "Off"
+        # For dimmer/RGB, use Level; for simple switches, use 254 when on
+        level = device.get("Level", 0)
+        if level == 0 and is_on:
+            level = 100  # Treat on switches as 100%
+        status = {
+            "on": is_on,
+            "bri": int(level * 2.54),
+            "hue": 0,
+            "sat": 0
+        }
+        if "Color" in device:
+            try:
+                color = json_loads(device["Color"]) if isinstance(device["Color"], str) else device["Color"]
+                r, g, b = color.get("r", 0), color.get("g", 0), color.get("b", 0)
+                h, s, v = self._rgb_to_hsv(r, g, b)
+                status["hue"] = int(h * 65535)
+                status["sat"] = int(s * 254)
+            except (json.JSONDecodeError, TypeError):
+                pass
+        return status
+
+    @staticmethod
+    def _scene_status(scene):
+        """Convert a Domoticz scene entry to Hue-style state values."""
+        return {
+            "on": scene.get("Status") == "On",
+            "bri": 254,
+            "hue": 0,
+            "sat": 0
+        }
 
     @staticmethod
     def _rgb_to_hsv(r, g, b):
         """Convert RGB (0-255) to HSV (0-1 range)."""
-        r, g, b = r / 255.0, g / 255.0, b / 255.0
         max_c = max(r, g, b)
-        min_c = min(r, g, b)
-        v = max_c
-        if max_c == min_c:
-            return 0, 0, v
-        s = (max_c - min_c) / max_c
-        rc = (max_c - r) / (max_c - min_c)
-        gc = (max_c - g) / (max_c - min_c)
-        bc = (max_c - b) / (max_c - min_c)
+        delta = max_c - min(r, g, b)
+        if delta == 0:
+            return 0, 0, max_c / 255.0
+        # Work on the 0-255 values and divide once per component
         if r == max_c:
-            h = bc - gc
+            h = g - b
         elif g == max_c:
-            h = 2.0 + rc - bc
+            h = 2 * delta + b - r
         else:
-            h = 4.0 + gc - rc
-        h = (h / 6.0) % 1.0
-        return h, s, v
+            h = 4 * delta + r - g
+        return (h / (6.0 * delta)) % 1.0, delta / max_c, max_c / 255.0
 
 
 class HueAPIHandler(BaseHTTPRequestHandler):
@@ -396,21 +717,29 @@ class HueAPIHandler(BaseHTTPRequestHandler):
     # Class variables set by main()
     devices = {}
     domoticz = None
-    bridge_ip = None
-    http_port = 80
+    description_xml = b""
+    status_keys = frozenset()
 
     def log_message(self, format, *args):
-        logger.info(f"HTTP: {args[0]}")
+        # Called for every request; skip the work entirely when INFO is off
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        logger.info("HTTP: %s", args[0])
 
     def _send_json(self, data, status=200):
         self.send_response(status)
         self.send_header("Content-Type", "application/json")
         self.send_header("Access-Control-Allow-Origin", "*")
         self.end_headers()
-        self.wfile.write(json.dumps(data).encode())
+        self.wfile.write(json_dumps(data))
+
+    def _fast_path(self):
+        """Return the request path without its query string."""
+        # Hue API paths are plain, so urlparse's general handling is not needed
+        return self.path.partition("?")[0]
 
     def do_GET(self):
-        path = urlparse(self.path).path
+        path = self._fast_path()
 
         if path == "/description.xml":
             self._send_description()
@@ -423,14 +752,14 @@ class HueAPIHandler(BaseHTTPRequestHandler):
         self.send_error(404)
 
     def do_POST(self):
-        path = urlparse(self.path).path
+        path = self._fast_path()
         if path.startswith("/api"):
             self._handle_api_post(path)
             return
         self.send_error(404)
 
     def do_PUT(self):
-        path = urlparse(self.path).path
+        path = self._fast_path()
         if path.startswith("/api"):
             self._handle_api_put(path)
             return
@@ -438,27 +767,10 @@ class HueAPIHandler(BaseHTTPRequestHandler):
 
     def _send_description(self):
         """Send UPnP device description XML."""
-        xml = f"""<?xml version="1.0" encoding="UTF-8" ?>
-<root xmlns="urn:schemas-upnp-org:device-1-0">
-    <specVersion><major>1</major><minor>0</minor></specVersion>
-    <URLBase>http://{self.bridge_ip}:{self.http_port}/</URLBase>
-    <device>
-        <deviceType>urn:schemas-upnp-org:device:Basic:1</deviceType>
-        <friendlyName>Philips Hue ({self.bridge_ip})</friendlyName>
-        <manufacturer>Royal Philips Electronics</manufacturer>
-        <manufacturerURL>http://www.philips.com</manufacturerURL>
-        <modelDescription>Philips hue Personal Wireless Lighting</modelDescription>
-        <modelName>Philips hue bridge 2015</modelName>
-        <modelNumber>BSB002</modelNumber>
-        <modelURL>http://www.meethue.com</modelURL>
-        <serialNumber>{BRIDGE_ID}</serialNumber>
-        <UDN>uuid:{BRIDGE_UUID}</UDN>
-    </device>
-</root>"""
         self.send_response(200)
         self.send_header("Content-Type", "application/xml")
         self.end_headers()
-        self.wfile.write(xml.encode())
+        self.wfile.write(self.description_xml)
 
     def _handle_api_get(self, path):
         """Handle GET requests to /api endpoints."""
@@ -492,11 +804,11 @@ class HueAPIHandler(BaseHTTPRequestHandler):
         body = self.rfile.read(content_length)
 
         try:
-            data = json.loads(body)
+            data = json_loads(body)
         except json.JSONDecodeError:
             data = {}
 
-        logger.info(f"PUT {path}: {data}")
+        logger.info("PUT %s: %s", path, data)
 
         parts = path.split("/")
         if "lights" in parts and "state" in parts:
@@ -509,39 +821,18 @@ class HueAPIHandler(BaseHTTPRequestHandler):
 
     def _get_all_lights(self):
         """Get all lights in Hue format."""
+        statuses = self.domoticz.get_all_device_status(self.status_keys)
         lights = {}
-        for light_id in self.devices:
-            lights[light_id] = self._get_light_state(light_id)
+        for light_id, device in self.devices.items():
+            status = statuses.get(device.status_key, DomoticzController.OFF_STATUS)
+            lights[light_id] = self._get_light_state(light_id, status)
         return lights
 
-    def _get_light_state(self, light_id):
+    def _get_light_state(self, light_id, status=None):
         """Get single light state in Hue format."""
-        device = self.devices.get(light_id, {})
-        is_scene = device.get("is_scene", False)
-        status = self.domoticz.get_device_status(device.get("idx", 0), is_scene)
-        device_type = device.get("type", "switch")
-
-        # Determine Hue device type and model
-        if device_type == "rgb":
-            hue_type = "Extended color light"
-            model_id = "LCT015"
-            product_name = "Hue color lamp"
-            color_mode = "hs"
-        elif device_type == "dimmer":
-            hue_type = "Dimmable light"
-            model_id = "LWB010"
-            product_name = "Hue white lamp"
-            color_mode = "ct"
-        elif device_type == "scene":
-            hue_type = "On/Off plug-in unit"
-            model_id = "LOM001"
-            product_name = "Hue smart plug"
-            color_mode = "ct"
-        else:
-            hue_type = "On/Off plug-in unit"
-            model_id = "LOM001"
-            product_name = "Hue smart plug"
-            color_mode = "ct"
+        device = self.devices[light_id]
+        if status is None:
+            status = self.domoticz.get_device_status(device.idx, device.is_scene)
 
         return {
             "state": {
@@ -549,20 +840,11 @@ class HueAPIHandler(BaseHTTPRequestHandler):
                 "bri": status["bri"],
                 "hue": status.get("hue", 0),
                 "sat": status.get("sat", 0),
-                "effect": "none",
-                "xy": [0.0, 0.0],
-                "ct": 500,
-                "alert": "none",
-                "colormode": color_mode,
-                "reachable": True
+                **device.static_state,
+                # Domoticz reports no ct; only an acked command supplies one
+                **({"ct": status["ct"]} if "ct" in status else {})
             },
-            "type": hue_type,
-            "name": device.get("name", f"Light {light_id}"),
-            "modelid": model_id,
-            "manufacturername": "Philips",
-            "productname": product_name,
-            "uniqueid": f"00:17:88:01:00:{light_id.zfill(2)}:00:00-0b",
-            "swversion": "1.0"
+            **device.hue_meta
         }
 
     def _control_light(self, light_id, data):
@@ -571,19 +853,21 @@ class HueAPIHandler(BaseHTTPRequestHandler):
             return [{"error": {"description": "Light not found"}}]
 
         device = self.devices[light_id]
-        idx = device["idx"]
-        device_type = device.get("type", "switch")
-        is_scene = device.get("is_scene", False)
+        idx = device.idx
+        device_type = device.type
+        is_scene = device.is_scene
+        prefix = device.state_path
+        commands = []
         result = []
 
         # Handle on/off
         if "on" in data:
             if is_scene:
-                self.domoticz.switch_scene(idx, data["on"])
+                commands.append(partial(self.domoticz.switch_scene, idx, data["on"]))
             else:
-                self.domoticz.switch_light(idx, data["on"])
+                commands.append(partial(self.domoticz.switch_light, idx, data["on"]))
             result.append({
-                "success": {f"/lights/{light_id}/state/on": data["on"]}
+                "success": {prefix + "on": data["on"]}
             })
 
         # For RGB lights, handle color, white, and brightness
@@ -595,36 +879,43 @@ class HueAPIHandler(BaseHTTPRequestHandler):
 
             # White/warm white mode (color temperature)
             if ct is not None:
-                self.domoticz.set_white_color(idx, ct, brightness=bri)
-                result.append({"success": {f"/lights/{light_id}/state/ct": ct}})
+                commands.append(partial(self.domoticz.set_white_color, idx, ct, brightness=bri))
+                result.append({"success": {prefix + "ct": ct}})
                 if bri is not None:
-                    result.append({"success": {f"/lights/{light_id}/state/bri": bri}})
+                    result.append({"success": {prefix + "bri": bri}})
 
             # Color mode (hue/saturation)
             elif hue is not None or sat is not None:
-                self.domoticz.set_rgb_color(idx, hue=hue, saturation=sat, brightness=bri)
+                commands.append(partial(self.domoticz.set_rgb_color, idx, hue=hue, saturation=sat, brightness=bri))
                 if hue is not None:
-                    result.append({"success": {f"/lights/{light_id}/state/hue": hue}})
+                    result.append({"success": {prefix + "hue": hue}})
                 if sat is not None:
-                    result.append({"success": {f"/lights/{light_id}/state/sat": sat}})
+                    result.append({"success": {prefix + "sat": sat}})
                 if bri is not None:
-                    result.append({"success": {f"/lights/{light_id}/state/bri": bri}})
+                    result.append({"success": {prefix + "bri": bri}})
 
             # Brightness only (no color change)
             elif bri is not None:
-                self.domoticz.set_brightness(idx, bri)
-                result.append({"success": {f"/lights/{light_id}/state/bri": bri}})
+                commands.append(partial(self.domoticz.set_brightness, idx, bri))
+                result.append({"success": {prefix + "bri": bri}})
 
         # For dimmer lights, handle brightness
         elif device_type == "dimmer" and "bri" in data and not is_scene:
             level = int(data["bri"] / 2.54)
-            self.domoticz.set_dimmer(idx, level)
-            result.append({"success": {f"/lights/{light_id}/state/bri": data["bri"]}})
+            commands.append(partial(self.domoticz.set_dimmer, idx, level))
+            result.append({"success": {prefix + "bri": data["bri"]}})
 
         # For switch/scene devices, acknowledge bri even though we ignore it
         # (Alexa sends bri with on commands and expects confirmation)
         elif device_type in ("switch", "scene") and "bri" in data:
-            result.append({"success": {f"/lights/{light_id}/state/bri": data["bri"]}})
+            result.append({"success": {prefix + "bri": data["bri"]}})
+
+        # Acknowledge right away; Domoticz calls for this light are queued
+        # behind its earlier commands, while other lights run in parallel
+        if commands:
+            acked = {path[len(prefix):]: value
+                     for entry in result for path, value in entry["success"].items()}
+            self.domoticz.submit(device.status_key, acked, *commands)
 
         return result
 
@@ -638,61 +929,112 @@ class SSDPResponder:
     def __init__(self, http_port, bridge_ip):
         self.http_port = http_port
         self.bridge_ip = bridge_ip
-        self.running = False
+        self.sock = None
+        # The M-SEARCH reply never changes, so build it once
+        self._response_bytes = f"""HTTP/1.1 200 OK\r
+HOST: 239.255.255.250:1900\r
+CACHE-CONTROL: max-age=100\r
+EXT:\r
+LOCATION: http://{self.bridge_ip}:{self.http_port}/description.xml\r
+SERVER: Linux/3.14.0 UPnP/1.0 IpBridge/1.24.0\r
+hue-bridgeid: {BRIDGE_ID}\r
+ST: urn:schemas-upnp-org:device:basic:1\r
+USN: uuid:{BRIDGE_UUID}::urn:schemas-upnp-org:device:basic:1\r
+\r
+""".encode()
 
     def start(self):
-        self.running = True
-        thread = threading.Thread(target=self._listen, daemon=True)
-        thread.start()
-        logger.info(f"SSDP responder started on {self.SSDP_ADDR}:{self.SSDP_PORT}")
-
-    def stop(self):
-        self.running = False
-
-    def _listen(self):
+        """Open the multicast socket. Returns False if it cannot be bound."""
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, "SO_REUSEPORT"):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
 
         try:
             sock.bind(("", self.SSDP_PORT))
         except OSError as e:
-            logger.error(f"Cannot bind to SSDP port: {e}")
+            logger.error("Cannot bind to SSDP port: %s", e)
             logger.info("Try running with sudo or use a different port")
-            return
+            sock.close()
+            return False
+
+        # Join the SSDP group only on the bridge's interface, rather than on
+        # whichever interface the default route picks
+        try:
+            interface = socket.inet_aton(self.bridge_ip)
+            mreq = struct.pack("4s4s", socket.inet_aton(self.SSDP_ADDR), interface)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+        except OSError as e:
+            logger.warning("Cannot join SSDP group on %s (%s), listening on all interfaces", self.bridge_ip, e)
+            mreq = struct.pack("4sl", socket.inet_aton(self.SSDP_ADDR), socket.INADDR_ANY)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+        else:
+            # Linux otherwise also delivers SSDP traffic from any interface
+            # another process joined the group on (docker, wifi, ...);
+            # not every Python build exposes the constant (49 in linux/in.h)
+            if sys.platform.startswith("linux"):
+                try:
+                    sock.setsockopt(socket.IPPROTO_IP, getattr(socket, "IP_MULTICAST_ALL", 49), 0)
+                except OSError as e:
+                    logger.debug("Cannot disable IP_MULTICAST_ALL: %s", e)
+        sock.setblocking(False)
+        self.sock = sock
+        logger.info("SSDP responder started on %s:%s", self.SSDP_ADDR, self.SSDP_PORT)
+        return True
 
-        mreq = struct.pack("4sl", socket.inet_aton(self.SSDP_ADDR), socket.INADDR_ANY)
-        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
-        sock.settimeout(1)
+    def stop(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def handle_request(self):
+        """Answer every M-SEARCH waiting on the socket."""
+        # Several Echo devices often search at once; drain them in one wakeup
+        while True:
+            try:
+                data, addr = self.sock.recvfrom(1024)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                logger.error("SSDP error: %s", e)
+                return
 
-        while self.running:
             try:
-                data, addr = sock.recvfrom(1024)
                 message = data.decode('utf-8', errors='ignore')
 
                 if "M-SEARCH" in message and ("ssdp:all" in message or "device:basic" in message.lower() or "upnp:rootdevice" in message):
-                    logger.info(f"SSDP M-SEARCH from {addr}")
-                    self._send_response(sock, addr)
+                    logger.info("SSDP M-SEARCH from %s", addr)
+                    self._send_response(self.sock, addr)
 
-            except socket.timeout:
-                continue
             except Exception as e:
-                logger.error(f"SSDP error: {e}")
+                logger.error("SSDP error: %s", e)
 
     def _send_response(self, sock, addr):
         """Send SSDP response to Alexa."""
-        response = f"""HTTP/1.1 200 OK\r
-HOST: 239.255.255.250:1900\r
-CACHE-CONTROL: max-age=100\r
-EXT:\r
-LOCATION: http://{self.bridge_ip}:{self.http_port}/description.xml\r
-SERVER: Linux/3.14.0 UPnP/1.0 IpBridge/1.24.0\r
-hue-bridgeid: {BRIDGE_ID}\r
-ST: urn:schemas-upnp-org:device:basic:1\r
-USN: uuid:{BRIDGE_UUID}::urn:schemas-upnp-org:device:basic:1\r
-\r
-"""
-        sock.sendto(response.encode(), addr)
-        logger.info(f"SSDP response sent to {addr}")
+        sock.sendto(self._response_bytes, addr)
+        logger.info("SSDP response sent to %s", addr)
+
+
+def serve_forever(server, ssdp):
+    """
+    Serve HTTP and SSDP from one selector loop in the main thread.
+
+    The loop only wakes up when a socket is readable; HTTP requests are still
+    handed off to the server's per-request threads. Both sockets are
+    non-blocking so a spurious wakeup can never stall the loop.
+    """
+    server.socket.setblocking(False)
+    with selectors.DefaultSelector() as selector:
+        selector.register(server, selectors.EVENT_READ, server._handle_request_noblock)
+        if ssdp.sock is not None:
+            selector.register(ssdp, selectors.EVENT_READ, ssdp.handle_request)
+
+        while True:
+            for key, _ in selector.select():
+                key.data()
 
 
 def main():
@@ -743,8 +1085,8 @@ Config file format (YAML):
     devices = build_devices_dict(config)
 
     # Count devices and scenes
-    num_devices = len([d for d in devices.values() if not d.get('is_scene')])
-    num_scenes = len([d for d in devices.values() if d.get('is_scene')])
+    num_devices = len([d for d in devices.values() if not d.is_scene])
+    num_scenes = len([d for d in devices.values() if d.is_scene])
 
     # Initialize Domoticz controller
     domoticz = DomoticzController(domoticz_url, domoticz_username, domoticz_password)
@@ -752,8 +1094,8 @@ Config file format (YAML):
     # Set class variables for HTTP handler
     HueAPIHandler.devices = devices
     HueAPIHandler.domoticz = domoticz
-    HueAPIHandler.bridge_ip = bridge_ip
-    HueAPIHandler.http_port = http_port
+    HueAPIHandler.description_xml = build_description_xml(bridge_ip, http_port)
+    HueAPIHandler.status_keys = frozenset(device.status_key for device in devices.values())
 
     # Print startup banner
     print(f"""
@@ -774,24 +1116,30 @@ Config file format (YAML):
     # List configured devices and scenes
     print("Configured devices:")
     for light_id, device in devices.items():
-        device_type = "SCENE" if device.get('is_scene') else device.get('type', 'switch').upper()
-        print(f"  [{light_id}] {device['name']} (idx: {device['idx']}, type: {device_type})")
+        device_type = "SCENE" if device.is_scene else device.type.upper()
+        print(f"  [{light_id}] {device.name} (idx: {device.idx}, type: {device_type})")
     print()
 
-    # Start SSDP responder
+    # Open SSDP responder socket
     ssdp = SSDPResponder(http_port, bridge_ip)
     ssdp.start()
 
-    # Start HTTP server
+    # Start HTTP server (one thread per request, so a slow Domoticz call
+    # only blocks the Alexa request waiting on it)
     try:
-        server = HTTPServer(("", http_port), HueAPIHandler)
-        logger.info(f"HTTP server started on port {http_port}")
-        server.serve_forever()
+        server = ThreadingHTTPServer(("", http_port), HueAPIHandler)
+        server.daemon_threads = True
     except PermissionError:
         logger.error(f"Permission denied for port {http_port}. Try: sudo python3 {__file__}")
         sys.exit(1)
+
+    logger.info(f"HTTP server started on port {http_port}")
+    try:
+        serve_forever(server, ssdp)
     except KeyboardInterrupt:
         logger.info("Shutting down...")
+    finally:
+        server.server_close()
         ssdp.stop()
 
 